@@ -1,15 +1,27 @@
+import os
+import time
+import uuid
 import streamlit as st
 import pandas as pd
 import io
-import base64
-from PIL import Image
 
 from data_processor import process_data, detect_column_types
-from nlp_parser import parse_command
-from chart_generator import generate_chart
+from nlp_parser import parse_command, parse_resample_options, parse_heatmap_options
+from chart_jobs import submit_chart, get_chart_status, PENDING, RUNNING, DONE, CANCELLED, FAILED
+from precompute import start_precompute
+
+# Welcome-page thumbnails ship with the app so the page renders without network access
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# How often to check on a background chart job, in seconds
+CHART_POLL_INTERVAL = 0.1
 
 st.set_page_config(page_title="Data Visualization App", layout="wide")
 
+# Identify this browser session so a new command can supersede its previous chart job
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
 st.title("Data Visualization Assistant")
 st.markdown("""
 Upload your data file (CSV or Excel) and use natural language to create beautiful visualizations.
@@ -62,6 +74,9 @@ if uploaded_file is not None:
             # Display column information
             st.subheader("Column Information")
             column_types = detect_column_types(df)
+            
+            # Build the charts users usually ask for first while they read the column table
+            start_precompute(st.session_state.session_id, uploaded_file.file_id, df, column_types)
             col_info = pd.DataFrame({
                 "Type": [column_types[col] for col in df.columns],
                 "Sample Values": [', '.join(str(x) for x in df[col].dropna().head(3).tolist()) for col in df.columns]
@@ -80,21 +95,49 @@ if uploaded_file is not None:
             if command:
                 # Parse the command and generate appropriate chart
                 chart_type, x_col, y_col, title, error = parse_command(command, df, column_types)
+                freq, reducer = parse_resample_options(command)
+                top_k, clustered = parse_heatmap_options(command)
                 
                 if error:
                     st.error(error)
                 else:
-                    # Generate the chart
-                    fig, suggestion = generate_chart(df, chart_type, x_col, y_col, title, column_types)
+                    # Generate the chart in the background, reusing the job across reruns
+                    # (e.g. the export button) as long as the request is unchanged
+                    job_key = (uploaded_file.file_id, chart_type, x_col, y_col, title,
+                               freq, reducer, top_k, clustered)
+                    if (st.session_state.get("chart_job_key") != job_key
+                            or get_chart_status(st.session_state.chart_job_id)[0] == CANCELLED):
+                        st.session_state.chart_job_key = job_key
+                        st.session_state.chart_job_id = submit_chart(
+                            st.session_state.session_id, df, chart_type, x_col, y_col, title, column_types,
+                            freq=freq, reducer=reducer, top_k=top_k, clustered=clustered,
+                            dataset_key=uploaded_file.file_id
+                        )
+                    job_id = st.session_state.chart_job_id
                     
-                    if suggestion:
-                        st.info(suggestion)
+                    # Poll for the result. Updating the placeholder lets Streamlit interrupt
+                    # this run when the command changes, and the new run cancels this job.
+                    status_placeholder = st.empty()
+                    started = time.time()
+                    status, fig, suggestion, chart_error = get_chart_status(job_id)
+                    while status in (PENDING, RUNNING):
+                        label = "Waiting for a free worker" if status == PENDING else "Generating chart"
+                        status_placeholder.caption(f"⏳ {label}... ({time.time() - started:.1f}s)")
+                        time.sleep(CHART_POLL_INTERVAL)
+                        status, fig, suggestion, chart_error = get_chart_status(job_id)
+                    status_placeholder.empty()
                     
-                    # Display the chart
-                    st.plotly_chart(fig, use_container_width=True)
+                    if status == FAILED:
+                        st.error(chart_error)
+                    elif status == DONE:
+                        if suggestion:
+                            st.info(suggestion)
+                        
+                        # Display the chart
+                        st.plotly_chart(fig, use_container_width=True)
                     
                     # Export options
-                    if st.button("Export Chart"):
+                    if status == DONE and st.button("Export Chart"):
                         if export_format == "PNG":
                             # Export as PNG
                             buffer = io.BytesIO()
@@ -129,9 +172,9 @@ else:
     st.subheader("Sample Visualizations")
     col1, col2 = st.columns(2)
     with col1:
-        st.image("https://plotly.com/~PlotBot/6431.png", caption="Sample Bar Chart")
+        st.image(os.path.join(ASSETS_DIR, "sample_bar.svg"), caption="Sample Bar Chart")
     with col2:
-        st.image("https://plotly.com/~PlotBot/6435.png", caption="Sample Line Chart")
+        st.image(os.path.join(ASSETS_DIR, "sample_line.svg"), caption="Sample Line Chart")
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules the app imports before the first chart is requested
+STARTUP_MODULES = ["data_processor", "nlp_parser", "chart_generator", "chart_jobs", "precompute",
+                   "time_series", "correlation", "cache"]
+
+# Heavy modules that must not be loaded until they are actually needed
+DEFERRED_MODULES = ["plotly", "openpyxl", "PIL"]
+
+# Thumbnails the welcome page renders from disk
+WELCOME_ASSETS = ["sample_bar.svg", "sample_line.svg"]
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Median timings recorded with --record, which later runs are compared against
+BASELINE_PATH = os.path.join(APP_DIR, "startup_baseline.json")
+
+# Imports the app modules, then runs app.py's welcome page against a stubbed streamlit,
+# so the timing covers the app script itself but not streamlit's own import
+PROBE = """
+import json, sys, time
+from unittest import mock
+
+start = time.perf_counter()
+{imports}
+modules_elapsed = time.perf_counter() - start
+
+class SessionState(dict):
+    __getattr__ = dict.get
+    __setattr__ = dict.__setitem__
+
+st = mock.MagicMock()
+st.session_state = SessionState()
+st.file_uploader.return_value = None
+st.columns.side_effect = lambda spec, **kwargs: [mock.MagicMock() for _ in range(spec if isinstance(spec, int) else len(spec))]
+sys.modules["streamlit"] = st
+
+start = time.perf_counter()
+import app
+app_elapsed = time.perf_counter() - start
+
+loaded = [m for m in {deferred!r} if m in sys.modules]
+print(json.dumps({{"modules": modules_elapsed, "app": app_elapsed, "eager": loaded}}))
+"""
+
+def measure_cold_start():
+    """
+    Start the app in a fresh interpreter and time it.
+
+    Returns:
+    - modules_seconds: Time to import the app's modules
+    - app_seconds: Time to run app.py's welcome page with streamlit stubbed out
+    - eager: Deferred modules that were loaded anyway
+    """
+    code = PROBE.format(
+        imports="\n".join(f"import {name}" for name in STARTUP_MODULES),
+        deferred=DEFERRED_MODULES
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    timing = json.loads(result.stdout.strip().split("\n")[-1])
+    return timing["modules"], timing["app"], timing["eager"]
+
+def load_baseline():
+    """Return the recorded baseline timings, or None if none has been recorded."""
+    if not os.path.exists(BASELINE_PATH):
+        return None
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that app cold start stays fast.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to time")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed increase over the recorded baseline, as a fraction (0.25 = 25%%)")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Optional absolute maximum for the median cold start, in seconds")
+    parser.add_argument("--record", action="store_true",
+                        help="Save this run's medians as the new baseline instead of checking against it")
+    args = parser.parse_args()
+
+    failures = []
+
+    missing_assets = [name for name in WELCOME_ASSETS
+                      if not os.path.exists(os.path.join(APP_DIR, "assets", name))]
+    if missing_assets:
+        failures.append(f"Missing welcome thumbnails: {', '.join(missing_assets)}")
+
+    module_timings = []
+    app_timings = []
+    eager = set()
+    for _ in range(args.runs):
+        modules_elapsed, app_elapsed, loaded = measure_cold_start()
+        module_timings.append(modules_elapsed)
+        app_timings.append(app_elapsed)
+        eager.update(loaded)
+
+    timings = {
+        "modules": statistics.median(module_timings),
+        "app": statistics.median(app_timings),
+        "total": statistics.median(m + a for m, a in zip(module_timings, app_timings))
+    }
+    print(f"Cold start: median {timings['total']:.3f}s "
+          f"(modules {timings['modules']:.3f}s, app {timings['app']:.3f}s) over {args.runs} runs")
+
+    if eager:
+        failures.append(f"Heavy modules loaded at startup: {', '.join(sorted(eager))}")
+    if args.budget is not None and timings["total"] > args.budget:
+        failures.append(f"Median cold start {timings['total']:.3f}s exceeds budget of {args.budget:.3f}s")
+
+    if args.record:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({name: round(value, 4) for name, value in timings.items()}, f, indent=2)
+            f.write("\n")
+        print(f"Recorded baseline in {os.path.basename(BASELINE_PATH)}")
+    else:
+        baseline = load_baseline()
+        if baseline is None:
+            failures.append("No baseline recorded; run with --record first")
+        else:
+            limit = baseline["total"] * (1 + args.tolerance)
+            change = timings["total"] / baseline["total"] - 1
+            print(f"Baseline: {baseline['total']:.3f}s "
+                  f"(modules {baseline['modules']:.3f}s, app {baseline['app']:.3f}s), change {change:+.0%}")
+            if timings["total"] > limit:
+                failures.append(f"Median cold start {timings['total']:.3f}s is {change:.0%} slower than "
+                                f"the {baseline['total']:.3f}s baseline (tolerance {args.tolerance:.0%})")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
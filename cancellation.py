@@ -0,0 +1,7 @@
+class ChartCancelled(Exception):
+    """Raised when a chart computation is cancelled before it finishes."""
+
+def check_cancelled(cancel_event):
+    """Stop the current chart computation if it has been cancelled."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise ChartCancelled()
@@ -1,12 +1,32 @@
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 
-def generate_chart(df, chart_type, x_col, y_col, title, column_types):
-    """Generate a chart based on the type and columns."""
+from cancellation import check_cancelled
+from time_series import resample_time_series, describe_rollup, FREQUENCY_LABELS, DEFAULT_POINT_BUDGET
+from correlation import (correlation_matrix, pair_correlation, top_correlated, cluster_order,
+                         MAX_HEATMAP_COLUMNS)
+
+def generate_chart(df, chart_type, x_col, y_col, title, column_types, cancel_event=None,
+                   freq=None, reducer='sum', dataset_key=None, top_k=None, clustered=False):
+    """
+    Generate a chart based on the type and columns.
+
+    If a cancel_event is given, the computation stops with ChartCancelled
+    at the next checkpoint after the event is set, including checkpoints
+    inside resampling and the correlation engine. Line charts over a datetime
+    axis are bucketed by freq (chosen automatically if None) and reducer, and
+    the rollups are cached per dataset_key. Heatmaps can be limited to the
+    top_k most correlated columns and clustered into correlated blocks.
+    """
+    # Plotly is heavy to import, so load it on the first chart rather than at app start
+    import plotly.express as px
+
     suggestion = None
     
+    # Correlations and time series rollups skip missing values on their own, so they
+    # use the dataset as uploaded rather than the values filled in below
+    source_df = df
+    
     # Handle missing data for the selected columns
     if x_col and x_col in df.columns:
         if df[x_col].isnull().sum() > 0:
@@ -41,6 +61,8 @@ def generate_chart(df, chart_type, x_col, y_col, title, column_types):
                 df = df.dropna(subset=[y_col])
                 suggestion += " Rows with missing values were omitted."
     
+    check_cancelled(cancel_event)
+    
     # Generate chart based on type
     if chart_type == 'bar':
         # Check if we need to aggregate the data
@@ -101,17 +123,43 @@ def generate_chart(df, chart_type, x_col, y_col, title, column_types):
     elif chart_type == 'line':
         # For line charts, check if x-axis is datetime or numeric
         if column_types[x_col] == 'datetime':
-            # Sort by date for line charts
-            df_sorted = df.sort_values(by=x_col)
+            # Bucket dense or explicitly grouped time series instead of plotting raw timestamps.
+            # Rows with missing timestamps are masked out and the reducers skip missing values,
+            # so totals never include median-filled values.
+            rollup, used_freq = resample_time_series(source_df, x_col, y_col, freq=freq, reducer=reducer,
+                                                     dataset_key=dataset_key, cancel_event=cancel_event)
             
-            fig = px.line(
-                df_sorted, 
-                x=x_col, 
-                y=y_col,
-                title=title,
-                labels={x_col: x_col.replace('_', ' ').title(), y_col: y_col.replace('_', ' ').title()},
-                markers=True
-            )
+            if rollup is not None:
+                if suggestion:
+                    suggestion = suggestion.replace(" Missing values were filled with the median.",
+                                                    " Missing values were left out of the buckets.")
+                value_col = y_col if y_col else 'count'
+                fig = px.line(
+                    rollup, 
+                    x=x_col, 
+                    y=value_col,
+                    title=title,
+                    labels={x_col: x_col.replace('_', ' ').title(), value_col: value_col.replace('_', ' ').title()},
+                    markers=True
+                )
+                
+                rollup_note = f"Showing {describe_rollup(y_col, used_freq, reducer)}."
+                if freq and used_freq != freq:
+                    rollup_note += (f" A {FREQUENCY_LABELS[freq]} breakdown would draw more than "
+                                    f"{DEFAULT_POINT_BUDGET} points, so the buckets were widened.")
+                suggestion = f"{suggestion}\n{rollup_note}" if suggestion else rollup_note
+            else:
+                # Sort by date for line charts
+                df_sorted = df.sort_values(by=x_col)
+                
+                fig = px.line(
+                    df_sorted, 
+                    x=x_col, 
+                    y=y_col,
+                    title=title,
+                    labels={x_col: x_col.replace('_', ' ').title(), y_col: y_col.replace('_', ' ').title()},
+                    markers=True
+                )
         elif column_types[x_col] == 'numerical':
             # Sort by numeric x-axis
             df_sorted = df.sort_values(by=x_col)
@@ -177,7 +225,7 @@ def generate_chart(df, chart_type, x_col, y_col, title, column_types):
             )
             
             # Calculate correlation coefficient
-            correlation = df[x_col].corr(df[y_col])
+            correlation = pair_correlation(source_df, x_col, y_col, dataset_key=dataset_key)
             suggestion = f"The correlation between '{x_col}' and '{y_col}' is {correlation:.2f}"
     
     elif chart_type == 'histogram':
@@ -241,7 +289,20 @@ def generate_chart(df, chart_type, x_col, y_col, title, column_types):
             )
         else:
             # Calculate correlation matrix
-            corr_matrix = df[numeric_columns].corr()
+            corr_matrix = correlation_matrix(source_df, numeric_columns, dataset_key=dataset_key,
+                                             cancel_event=cancel_event)
+            
+            # Wide tables are unreadable in full, so keep the most correlated columns
+            if top_k is None and len(numeric_columns) > MAX_HEATMAP_COLUMNS:
+                top_k = MAX_HEATMAP_COLUMNS
+                clustered = True
+                width_note = (f"There are {len(numeric_columns)} numeric columns, so only the {top_k} "
+                              f"most correlated are shown, grouped into correlated blocks.")
+                suggestion = f"{suggestion}\n{width_note}" if suggestion else width_note
+            if top_k is not None:
+                corr_matrix = top_correlated(corr_matrix, top_k)
+            if clustered:
+                corr_matrix = cluster_order(corr_matrix)
             
             # Create heatmap
             fig = px.imshow(
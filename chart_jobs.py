@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from cache import LRUCache
+from cancellation import ChartCancelled
+from chart_generator import generate_chart
+
+# Maximum number of charts built at the same time across all sessions on this server
+MAX_CONCURRENT_JOBS = int(os.environ.get("VISUALIO_MAX_CHART_JOBS", "4"))
+
+# Seconds a finished job is kept for polling before it is forgotten. Sessions that
+# poll an expired job see it as cancelled and resubmit, usually hitting the chart cache.
+FINISHED_JOB_TTL = float(os.environ.get("VISUALIO_FINISHED_JOB_TTL", "300"))
+
+# Maximum number of finished charts kept for reuse across sessions
+CHART_CACHE_SIZE = int(os.environ.get("VISUALIO_CHART_CACHE_SIZE", "128"))
+
+# Approximate memory the chart cache may hold, since figures embed their plotted data
+CHART_CACHE_MAX_MB = float(os.environ.get("VISUALIO_CHART_CACHE_MAX_MB", "256"))
+
+# Rough in-memory cost of one non-numeric value (e.g. a category label) in a figure
+ESTIMATED_OBJECT_BYTES = 64
+
+# Defaults for the generate_chart options that are part of a chart's cache key
+CHART_OPTION_DEFAULTS = {
+    'freq': None,
+    'reducer': 'sum',
+    'top_k': None,
+    'clustered': False
+}
+
+# Job statuses reported by get_chart_status
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix="chart-job")
+_lock = threading.Lock()
+_jobs = {}
+_session_jobs = {}
+
+class ChartJob:
+    """A chart computation submitted to the worker executor."""
+
+    def __init__(self, job_id, session_id):
+        self.job_id = job_id
+        self.session_id = session_id
+        self.cancel_event = threading.Event()
+        self.started = threading.Event()
+        self.future = None
+        self.finished_at = None
+
+    def _mark_finished(self, future):
+        self.finished_at = time.monotonic()
+
+def _prune_finished_jobs():
+    """Forget jobs that finished more than FINISHED_JOB_TTL seconds ago, e.g. from ended sessions."""
+    cutoff = time.monotonic() - FINISHED_JOB_TTL
+    with _lock:
+        expired = [job for job in _jobs.values()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job in expired:
+            del _jobs[job.job_id]
+            if _session_jobs.get(job.session_id) == job.job_id:
+                del _session_jobs[job.session_id]
+
+def estimate_chart_bytes(entry):
+    """Estimate the memory held by a cached (fig, suggestion) from its trace data."""
+    fig, suggestion = entry
+    total = 0
+    for trace in fig.data:
+        for attr in ('x', 'y', 'z', 'values', 'labels'):
+            values = getattr(trace, attr, None)
+            if values is None:
+                continue
+            values = np.asarray(values)
+            if values.dtype == object:
+                total += values.size * ESTIMATED_OBJECT_BYTES
+            else:
+                total += values.nbytes
+    return total
+
+_chart_cache = LRUCache(max_entries=CHART_CACHE_SIZE, max_bytes=CHART_CACHE_MAX_MB * 1024 * 1024,
+                        sizeof=estimate_chart_bytes)
+
+def chart_cache_key(chart_type, x_col, y_col, title, dataset_key=None, **chart_options):
+    """Return the chart cache key for a request, or None if the dataset is unknown."""
+    if dataset_key is None:
+        return None
+    options = dict(CHART_OPTION_DEFAULTS, **chart_options)
+    # Options only affect some chart types, so ignore the rest to share cache entries
+    if chart_type != 'line':
+        options['freq'], options['reducer'] = None, 'sum'
+    if chart_type != 'heatmap':
+        options['top_k'], options['clustered'] = None, False
+    return (dataset_key, chart_type, x_col, y_col, title,
+            options['freq'], options['reducer'], options['top_k'], options['clustered'])
+
+def get_cached_chart(key):
+    """Return the cached (fig, suggestion) for a key, or None."""
+    if key is None:
+        return None
+    return _chart_cache.get(key)
+
+def cache_chart(key, fig, suggestion):
+    """Store a finished chart so later requests for it return instantly."""
+    if key is not None:
+        _chart_cache.set(key, (fig, suggestion))
+
+def _run_job(job, df, chart_type, x_col, y_col, title, column_types, chart_options):
+    """Build the chart on a worker thread unless the job was cancelled while queued."""
+    job.started.set()
+    if job.cancel_event.is_set():
+        raise ChartCancelled()
+    fig, suggestion = generate_chart(df, chart_type, x_col, y_col, title, column_types,
+                                     cancel_event=job.cancel_event, **chart_options)
+    cache_chart(chart_cache_key(chart_type, x_col, y_col, title, **chart_options), fig, suggestion)
+    return fig, suggestion
+
+def submit_chart(session_id, df, chart_type, x_col, y_col, title, column_types, **chart_options):
+    """
+    Queue a chart for background computation and return its job ID.
+
+    Any earlier job for the same session is cancelled, since a newer command supersedes it.
+    Extra keyword arguments (e.g. freq, reducer, dataset_key) are passed to generate_chart.
+    Charts already in the chart cache complete immediately without using a worker.
+    """
+    _prune_finished_jobs()
+
+    job = ChartJob(uuid.uuid4().hex, session_id)
+    with _lock:
+        previous_id = _session_jobs.get(session_id)
+        _session_jobs[session_id] = job.job_id
+        _jobs[job.job_id] = job
+    if previous_id:
+        cancel_chart(previous_id)
+
+    cached = get_cached_chart(chart_cache_key(chart_type, x_col, y_col, title, **chart_options))
+    if cached is not None:
+        job.started.set()
+        job.future = Future()
+        job.future.set_result(cached)
+    else:
+        job.future = _executor.submit(_run_job, job, df, chart_type, x_col, y_col, title,
+                                      column_types, chart_options)
+    job.future.add_done_callback(job._mark_finished)
+    return job.job_id
+
+def cancel_chart(job_id):
+    """Cancel a job and forget it. Running jobs stop at their next checkpoint."""
+    with _lock:
+        job = _jobs.pop(job_id, None)
+        if job and _session_jobs.get(job.session_id) == job_id:
+            del _session_jobs[job.session_id]
+    if job is None:
+        return False
+
+    job.cancel_event.set()
+    if job.future is not None:
+        job.future.cancel()
+    return True
+
+def get_chart_status(job_id):
+    """
+    Poll a job without blocking.
+
+    Returns:
+    - status: One of 'pending', 'running', 'done', 'cancelled' or 'failed'
+    - fig: The chart figure once the job is done, otherwise None
+    - suggestion: The suggestion returned with the chart, if any
+    - error: Error message if the job failed
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is None or job.cancel_event.is_set():
+        return CANCELLED, None, None, None
+
+    future = job.future
+    if not future.done():
+        return (RUNNING if job.started.is_set() else PENDING), None, None, None
+    if future.cancelled():
+        return CANCELLED, None, None, None
+
+    exception = future.exception()
+    if isinstance(exception, ChartCancelled):
+        return CANCELLED, None, None, None
+    if exception is not None:
+        return FAILED, None, None, f"Error generating chart: {str(exception)}"
+
+    fig, suggestion = future.result()
+    return DONE, fig, suggestion, None
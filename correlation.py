@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+from cancellation import check_cancelled
+
+# Number of columns per block when computing the correlation matrix
+DEFAULT_BLOCK_SIZE = 256
+
+# Largest matrix drawn in full; wider tables are reduced to the top-K columns
+MAX_HEATMAP_COLUMNS = 50
+
+# Latest correlation matrix per dataset, stored with the columns it covers
+_matrix_cache = LRUCache(max_entries=8)
+
+def _standardize(df, columns, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Return column-standardized float32 values with NaNs set to zero, a float32
+    validity mask, and a flag per column marking those with no variance.
+
+    Each block of columns is centered and scaled in float64 before the cast to
+    float32, so columns with a large offset keep their variation and the float32
+    sums below stay well conditioned. Only one block is held in float64 at a time.
+    """
+    n_rows, n_cols = len(df), len(columns)
+    values = np.empty((n_rows, n_cols), dtype=np.float32)
+    mask = np.empty((n_rows, n_cols), dtype=np.float32)
+    constant = np.empty(n_cols, dtype=bool)
+
+    for start in range(0, n_cols, block_size):
+        stop = min(start + block_size, n_cols)
+        block = df[columns[start:stop]].to_numpy(dtype=np.float64, na_value=np.nan)
+        block_mask = ~np.isnan(block)
+        counts = np.maximum(block_mask.sum(axis=0), 1)
+
+        means = np.where(block_mask, block, 0).sum(axis=0) / counts
+        block = np.where(block_mask, block - means, 0)
+        stds = np.sqrt(np.einsum('ij,ij->j', block, block) / counts)
+
+        # Rounding in the mean can leave a constant column with a tiny spread
+        block_constant = stds <= 1e-12 * np.maximum(np.abs(means), 1)
+        block[:, block_constant] = 0
+        stds[block_constant] = 1
+
+        values[:, start:stop] = block / stds
+        mask[:, start:stop] = block_mask
+        constant[start:stop] = block_constant
+
+    return values, mask, constant
+
+def _pairwise_block(xi, mi, xj, mj):
+    """Correlate two column blocks, using only the rows where both columns are present."""
+    n = mi.T @ mj
+    sx = xi.T @ mj
+    sy = mi.T @ xj
+    sxx = (xi * xi).T @ mj
+    syy = mi.T @ (xj * xj)
+    sxy = xi.T @ xj
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        corr = cov / np.sqrt(var_x * var_y)
+
+    tolerance = 1e-6 * n
+    corr[(n < 2) | (var_x <= tolerance) | (var_y <= tolerance)] = np.nan
+    return corr
+
+def _complete_block(xi, xj, n):
+    """Correlate two column blocks when no values are missing."""
+    return (xi.T @ xj) / np.float32(n)
+
+def compute_correlation_matrix(df, columns, block_size=DEFAULT_BLOCK_SIZE, cancel_event=None):
+    """
+    Compute pairwise Pearson correlations in float32, one block of columns at a time.
+
+    Missing values are handled pairwise: each pair only uses rows where both columns
+    are present. Pairs with fewer than two such rows or no variance are NaN.
+    A set cancel_event stops the computation with ChartCancelled before the next block.
+    """
+    columns = list(columns)
+    values, mask, constant = _standardize(df, columns, block_size)
+    has_missing = not mask.all()
+    n_rows = values.shape[0]
+    n_cols = len(columns)
+
+    result = np.empty((n_cols, n_cols), dtype=np.float32)
+    for i in range(0, n_cols, block_size):
+        xi, mi = values[:, i:i + block_size], mask[:, i:i + block_size]
+        for j in range(i, n_cols, block_size):
+            check_cancelled(cancel_event)
+            xj, mj = values[:, j:j + block_size], mask[:, j:j + block_size]
+            if has_missing:
+                block = _pairwise_block(xi, mi, xj, mj)
+            else:
+                block = _complete_block(xi, xj, n_rows)
+            result[i:i + block_size, j:j + block_size] = block
+            result[j:j + block_size, i:i + block_size] = block.T
+
+    np.clip(result, -1, 1, out=result)
+
+    # A column correlates perfectly with itself unless it has no variance
+    diagonal = np.diagonal(result).copy()
+    np.fill_diagonal(result, np.where(np.isnan(diagonal), np.nan, 1))
+    if not has_missing:
+        result[constant, :] = np.nan
+        result[:, constant] = np.nan
+
+    return pd.DataFrame(result, index=columns, columns=columns)
+
+def correlation_matrix(df, columns, dataset_key=None, cancel_event=None):
+    """Return the correlation matrix for the columns, reusing the cached one for this dataset."""
+    columns = tuple(columns)
+    if dataset_key is not None:
+        cached = _matrix_cache.get(dataset_key)
+        if cached is not None and cached[0] == columns:
+            return cached[1]
+
+    matrix = compute_correlation_matrix(df, columns, cancel_event=cancel_event)
+    if dataset_key is not None:
+        _matrix_cache.set(dataset_key, (columns, matrix))
+    return matrix
+
+def pair_correlation(df, x_col, y_col, dataset_key=None):
+    """Return the correlation between two columns, looked up in the cached matrix when possible."""
+    if dataset_key is not None:
+        cached = _matrix_cache.get(dataset_key)
+        if cached is not None and x_col in cached[0] and y_col in cached[0]:
+            return float(cached[1].at[x_col, y_col])
+
+    return float(compute_correlation_matrix(df, [x_col, y_col]).iat[0, 1])
+
+def _strength(corr):
+    """Absolute correlations with the diagonal and missing pairs scored lowest."""
+    strength = np.abs(corr.to_numpy(dtype=np.float32, copy=True))
+    np.fill_diagonal(strength, np.nan)
+    return np.nan_to_num(strength, nan=-1)
+
+def top_correlated(corr, k):
+    """Keep the k columns with the strongest correlation to any other column."""
+    if k >= len(corr.columns):
+        return corr
+    scores = _strength(corr).max(axis=1)
+    keep = np.sort(np.argsort(-scores, kind='stable')[:k])
+    return corr.iloc[keep, keep]
+
+def cluster_order(corr):
+    """
+    Reorder columns so strongly correlated ones sit next to each other as blocks.
+
+    Greedily chains each column to its most correlated unplaced neighbour,
+    starting from the most correlated column.
+    """
+    strength = _strength(corr)
+    n_cols = len(corr.columns)
+    if n_cols < 3:
+        return corr
+
+    placed = np.zeros(n_cols, dtype=bool)
+    current = int(strength.max(axis=1).argmax())
+    order = [current]
+    placed[current] = True
+    for _ in range(n_cols - 1):
+        candidates = np.where(placed, -2, strength[current])
+        current = int(candidates.argmax())
+        order.append(current)
+        placed[current] = True
+    return corr.iloc[order, order]
@@ -37,7 +37,14 @@ def parse_command(command, df, column_types):
     for chart, keywords in chart_keywords.items():
         if any(keyword in command for keyword in keywords):
             detected_chart_types.append(chart)
-    
+
+    # A time bucket phrase ("by month", "weekly") asks for a trend over time,
+    # unless a different chart type was named explicitly
+    freq, _ = parse_resample_options(command)
+    has_datetime = any(type_val == 'datetime' for type_val in column_types.values())
+    if freq and has_datetime and not [chart for chart in detected_chart_types if chart != 'line']:
+        detected_chart_types = ['line']
+
     # Find column names in the command
     potential_columns = []
     for col in df.columns:
@@ -52,7 +59,19 @@ def parse_command(command, df, column_types):
                 potential_columns.append(col)
     
     # Handle specific visualization types
-    if 'pie' in detected_chart_types:
+    if 'heatmap' in detected_chart_types:
+        # Heatmaps show correlations across all numerical columns
+        numerical_cols = [col for col, type_val in column_types.items() 
+                         if type_val == 'numerical']
+        
+        if len(numerical_cols) >= 2:
+            chart_type = 'heatmap'
+            x_col = numerical_cols[0]
+            title = "Correlation Matrix"
+        else:
+            error = "Could not find enough numerical columns for a correlation heatmap."
+    
+    elif 'pie' in detected_chart_types:
         # Pie charts typically show distribution of one categorical variable
         categorical_cols = [col for col, type_val in column_types.items() 
                           if type_val == 'categorical' and col in potential_columns]
@@ -237,4 +256,67 @@ def parse_command(command, df, column_types):
             else:
                 error = "Could not determine what to visualize based on your command."
     
-    return chart_type, x_col, y_col, title, error
\ No newline at end of file
+    return chart_type, x_col, y_col, title, error
+
+def parse_resample_options(command):
+    """
+    Parse the time bucket and aggregation requested for a time series.
+
+    Returns:
+    - freq: Bucket frequency (e.g. 'MS' for "by month"), or None to choose automatically
+    - reducer: Aggregation to apply in each bucket ('sum', 'mean', 'median', 'min', 'max' or 'count')
+    """
+    command = command.lower()
+    
+    frequency_keywords = {
+        's': [r'\b(by|per|each|every) second\b'],
+        'min': [r'\b(by|per|each|every) minute\b'],
+        'h': [r'\b(by|per|each|every) hour\b', r'\bhourly\b'],
+        'D': [r'\b(by|per|each|every) day\b', r'\bdaily\b'],
+        'W': [r'\b(by|per|each|every) week\b', r'\bweekly\b'],
+        'MS': [r'\b(by|per|each|every) month\b', r'\bmonthly\b'],
+        'QS': [r'\b(by|per|each|every) quarter\b', r'\bquarterly\b'],
+        'YS': [r'\b(by|per|each|every) year\b', r'\b(yearly|annually|annual)\b']
+    }
+    
+    reducer_keywords = {
+        'mean': [r'\baverage\b', r'\bmean\b', r'\bavg\b'],
+        'median': [r'\bmedian\b'],
+        'min': [r'\bmin\b', r'\bminimum\b', r'\blowest\b'],
+        'max': [r'\bmax\b', r'\bmaximum\b', r'\bhighest\b', r'\bpeak\b'],
+        'count': [r'\bcount\b', r'\bnumber of\b', r'\bhow many\b']
+    }
+    
+    freq = None
+    for candidate, patterns in frequency_keywords.items():
+        if any(re.search(pattern, command) for pattern in patterns):
+            freq = candidate
+            break
+    
+    reducer = 'sum'
+    for candidate, patterns in reducer_keywords.items():
+        if any(re.search(pattern, command) for pattern in patterns):
+            reducer = candidate
+            break
+    
+    return freq, reducer
+
+def parse_heatmap_options(command):
+    """
+    Parse how much of a correlation heatmap to show.
+
+    Returns:
+    - top_k: Number of most correlated columns to keep (e.g. "top 20"), or None for the default
+    - clustered: Whether to group correlated columns into blocks
+    """
+    command = command.lower()
+    
+    top_k = None
+    match = (re.search(r'\btop\s+(\d+)\b', command)
+             or re.search(r'\b(\d+)\s+(most\s+)?correlated\b', command))
+    if match:
+        top_k = max(int(match.group(1)), 2)
+    
+    clustered = bool(re.search(r'\b(cluster|clustered|clusters|blocks?|grouped)\b', command))
+    
+    return top_k, clustered
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import LRUCache
+from cancellation import ChartCancelled
+from chart_generator import generate_chart
+from chart_jobs import chart_cache_key, get_cached_chart, cache_chart
+from nlp_parser import parse_command
+
+# Background threads for speculative charts; one keeps precompute to a single core
+PRECOMPUTE_WORKERS = int(os.environ.get("VISUALIO_PRECOMPUTE_WORKERS", "1"))
+
+# Maximum number of precomputes queued or running at once. Each one keeps its dataset
+# in memory until it finishes, so uploads beyond this are not precomputed.
+MAX_ACTIVE_PRECOMPUTES = int(os.environ.get("VISUALIO_MAX_ACTIVE_PRECOMPUTES", "2"))
+
+# CPU seconds a dataset's precompute may use before it stops
+PRECOMPUTE_CPU_BUDGET = float(os.environ.get("VISUALIO_PRECOMPUTE_CPU_SECONDS", "10"))
+
+# Datasets larger than this in memory are not precomputed
+PRECOMPUTE_MAX_DATASET_MB = float(os.environ.get("VISUALIO_PRECOMPUTE_MAX_MB", "200"))
+
+# Maximum number of charts precomputed per dataset
+PRECOMPUTE_MAX_CHARTS = int(os.environ.get("VISUALIO_PRECOMPUTE_MAX_CHARTS", "20"))
+
+# Histograms and bar charts embed every row, so they are only precomputed for smaller datasets
+PRECOMPUTE_MAX_RAW_ROWS = int(os.environ.get("VISUALIO_PRECOMPUTE_MAX_RAW_ROWS", "50000"))
+RAW_ROW_CHART_TYPES = ('histogram', 'bar')
+
+# Categorical columns with more values than this are not worth a bar or pie chart
+MAX_PRECOMPUTE_CATEGORIES = 20
+
+_executor = ThreadPoolExecutor(max_workers=PRECOMPUTE_WORKERS, thread_name_prefix="chart-precompute")
+_lock = threading.Lock()
+_started_datasets = LRUCache(max_entries=256)
+_session_runs = {}
+
+class PrecomputeRun:
+    """A precompute queued or running for one session's dataset."""
+
+    def __init__(self, session_id, dataset_key):
+        self.session_id = session_id
+        self.dataset_key = dataset_key
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None:
+            # Dropping a queued task releases its dataset straight away
+            self.future.cancel()
+
+class CPUBudgetCancel:
+    """
+    Cancellation signal that also trips once the worker thread has used its CPU budget.
+
+    It is passed to generate_chart as cancel_event, so the checkpoints inside resampling
+    and the correlation engine stop a single long chart rather than only the next one.
+    """
+
+    def __init__(self, cancel_event, cpu_budget):
+        self.cancel_event = cancel_event
+        self.cpu_deadline = time.thread_time() + cpu_budget
+
+    def is_set(self):
+        return self.cancel_event.is_set() or time.thread_time() > self.cpu_deadline
+
+def _finish_run(run):
+    """Forget a run once it finishes, so only active runs are tracked per session."""
+    with _lock:
+        if _session_runs.get(run.session_id) is run:
+            del _session_runs[run.session_id]
+
+def likely_charts(df, column_types):
+    """
+    List the charts users are most likely to ask for first, in priority order.
+
+    Each chart is a (chart_type, x_col, y_col, title) tuple matching what parse_command
+    returns, so precomputed charts share cache entries with real commands.
+    """
+    charts = []
+
+    # The chart parse_command falls back to when no columns are recognised
+    chart_type, x_col, y_col, title, error = parse_command("", df, column_types)
+    if not error:
+        charts.append((chart_type, x_col, y_col, title))
+
+    categorical_cols = [col for col, type_val in column_types.items() if type_val == 'categorical']
+    numerical_cols = [col for col, type_val in column_types.items() if type_val == 'numerical']
+    datetime_cols = [col for col, type_val in column_types.items() if type_val == 'datetime']
+
+    if datetime_cols and numerical_cols:
+        charts.append(('line', datetime_cols[0], numerical_cols[0], f"{numerical_cols[0]} over Time"))
+
+    for col in categorical_cols:
+        if df[col].nunique() > MAX_PRECOMPUTE_CATEGORIES:
+            continue
+        if numerical_cols:
+            charts.append(('bar', col, numerical_cols[0], f"Count of {col}"))
+        charts.append(('pie', col, None, f"Distribution of {col}"))
+
+    for col in numerical_cols:
+        charts.append(('histogram', col, None, f"Distribution of {col}"))
+
+    # Figures that embed every row would take too much memory on large datasets
+    if len(df) > PRECOMPUTE_MAX_RAW_ROWS:
+        charts = [chart for chart in charts if chart[0] not in RAW_ROW_CHART_TYPES]
+
+    # Drop duplicates while keeping the priority order
+    return list(dict.fromkeys(charts))[:PRECOMPUTE_MAX_CHARTS]
+
+def _precompute(dataset_key, df, column_types, cancel_event):
+    """Build likely charts into the chart cache until cancelled or out of CPU budget."""
+    budget = CPUBudgetCancel(cancel_event, PRECOMPUTE_CPU_BUDGET)
+    for chart_type, x_col, y_col, title in likely_charts(df, column_types):
+        if budget.is_set():
+            break
+
+        key = chart_cache_key(chart_type, x_col, y_col, title, dataset_key=dataset_key)
+        if get_cached_chart(key) is not None:
+            continue
+
+        try:
+            fig, suggestion = generate_chart(df, chart_type, x_col, y_col, title, column_types,
+                                             cancel_event=budget, dataset_key=dataset_key)
+        except ChartCancelled:
+            break
+        except Exception:
+            # A speculative chart that fails is simply not cached
+            continue
+        cache_chart(key, fig, suggestion)
+
+def start_precompute(session_id, dataset_key, df, column_types):
+    """
+    Start precomputing likely charts for a freshly uploaded dataset.
+
+    Runs at most once per dataset. A session's earlier precompute is cancelled
+    when it uploads a different dataset. Oversized datasets are skipped, and so are
+    uploads arriving while MAX_ACTIVE_PRECOMPUTES runs are already queued or running.
+    Returns True if a precompute was started.
+    """
+    with _lock:
+        previous = _session_runs.get(session_id)
+        if previous is not None and previous.dataset_key == dataset_key:
+            return False
+        if previous is not None:
+            del _session_runs[session_id]
+    if previous is not None:
+        # Cancel outside the lock, since cancelling a queued task runs _finish_run at once
+        previous.cancel()
+
+    with _lock:
+        if dataset_key in _started_datasets or len(_session_runs) >= MAX_ACTIVE_PRECOMPUTES:
+            return False
+
+    if df.memory_usage(index=True, deep=True).sum() > PRECOMPUTE_MAX_DATASET_MB * 1024 * 1024:
+        # Remember the decision so reruns do not measure the dataset again
+        _started_datasets.set(dataset_key, True)
+        return False
+
+    run = PrecomputeRun(session_id, dataset_key)
+    with _lock:
+        if dataset_key in _started_datasets or len(_session_runs) >= MAX_ACTIVE_PRECOMPUTES:
+            return False
+        _started_datasets.set(dataset_key, True)
+        _session_runs[session_id] = run
+        run.future = _executor.submit(_precompute, dataset_key, df, column_types, run.cancel_event)
+
+    run.future.add_done_callback(lambda future: _finish_run(run))
+    return True
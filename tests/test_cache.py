@@ -0,0 +1,56 @@
+from cache import LRUCache
+
+def test_evicts_least_recently_used_entry_when_full():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+
+def test_evicts_to_stay_within_byte_budget():
+    cache = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+    cache.set('a', 'xxxx')
+    cache.set('b', 'xxxx')
+    cache.get('a')
+    cache.set('c', 'xxxx')
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+    assert cache.total_bytes == 8
+
+def test_values_larger_than_budget_are_not_stored():
+    cache = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+    cache.set('small', 'xxxx')
+    cache.set('huge', 'x' * 11)
+
+    assert 'huge' not in cache
+    assert 'small' in cache
+    assert cache.total_bytes == 4
+
+def test_replacing_a_key_updates_its_size():
+    cache = LRUCache(max_entries=10, max_bytes=10, sizeof=len)
+    cache.set('a', 'xxxxxxxx')
+    cache.set('a', 'xx')
+    cache.set('b', 'xxxxxxxx')
+
+    assert len(cache) == 2
+    assert cache.total_bytes == 10
+
+def test_get_or_compute_caches_and_none_key_skips_cache():
+    cache = LRUCache(max_entries=2)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'value'
+
+    assert cache.get_or_compute('key', compute) == 'value'
+    assert cache.get_or_compute('key', compute) == 'value'
+    assert cache.get_or_compute(None, compute) == 'value'
+    assert len(calls) == 2
+    assert len(cache) == 1
@@ -0,0 +1,156 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import chart_jobs
+from cache import LRUCache
+from cancellation import ChartCancelled, check_cancelled
+from chart_jobs import (submit_chart, cancel_chart, get_chart_status, chart_cache_key, cache_chart,
+                        get_cached_chart, PENDING, RUNNING, DONE, CANCELLED, FAILED)
+
+DF = pd.DataFrame({'region': ['a', 'b', 'a'], 'sales': [1.0, 2.0, 3.0]})
+COLUMN_TYPES = {'region': 'categorical', 'sales': 'numerical'}
+
+class FakeFigure:
+    data = ()
+
+class BlockingChart:
+    """Stands in for generate_chart, waiting at a cancellation checkpoint until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+
+    def __call__(self, df, chart_type, x_col, y_col, title, column_types, cancel_event=None, **options):
+        self.calls.append(title)
+        self.started.set()
+        while not self.release.wait(0.01):
+            check_cancelled(cancel_event)
+        return FakeFigure(), f"built {title}"
+
+@pytest.fixture
+def chart(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(chart_jobs, '_executor', executor)
+    monkeypatch.setattr(chart_jobs, '_jobs', {})
+    monkeypatch.setattr(chart_jobs, '_session_jobs', {})
+    monkeypatch.setattr(chart_jobs, '_chart_cache', LRUCache(max_entries=8))
+    fake = BlockingChart()
+    monkeypatch.setattr(chart_jobs, 'generate_chart', fake)
+    yield fake
+    fake.release.set()
+    executor.shutdown(wait=True)
+
+def _submit(session_id, title, **options):
+    return submit_chart(session_id, DF, 'bar', 'region', 'sales', title, COLUMN_TYPES, **options)
+
+def _wait(job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = get_chart_status(job_id)
+        if status[0] not in (PENDING, RUNNING):
+            return status
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+def test_job_runs_in_background_and_completes(chart):
+    job_id = _submit('s1', 'first')
+    assert chart.started.wait(5)
+    assert get_chart_status(job_id)[0] == RUNNING
+
+    chart.release.set()
+    status, fig, suggestion, error = _wait(job_id)
+
+    assert status == DONE
+    assert isinstance(fig, FakeFigure)
+    assert suggestion == "built first"
+    assert error is None
+
+def test_newer_command_cancels_running_job(chart):
+    old_id = _submit('s1', 'old')
+    old_job = chart_jobs._jobs[old_id]
+    assert chart.started.wait(5)
+
+    new_id = _submit('s1', 'new')
+
+    assert get_chart_status(old_id)[0] == CANCELLED
+    # The running job stops at its next checkpoint instead of finishing
+    assert isinstance(old_job.future.exception(timeout=5), ChartCancelled)
+
+    chart.release.set()
+    status, fig, suggestion, error = _wait(new_id)
+    assert (status, suggestion) == (DONE, "built new")
+    assert chart_jobs._session_jobs == {'s1': new_id}
+
+def test_queued_job_cancelled_before_it_starts(chart):
+    running_id = _submit('s1', 'running')
+    assert chart.started.wait(5)
+    queued_id = _submit('s2', 'queued')
+    assert get_chart_status(queued_id)[0] == PENDING
+
+    assert cancel_chart(queued_id)
+    assert get_chart_status(queued_id)[0] == CANCELLED
+
+    chart.release.set()
+    assert _wait(running_id)[0] == DONE
+    assert chart.calls == ['running']
+
+def test_chart_cancelled_maps_to_cancelled(chart, monkeypatch):
+    def cancelled_chart(*args, **kwargs):
+        raise ChartCancelled()
+    monkeypatch.setattr(chart_jobs, 'generate_chart', cancelled_chart)
+
+    assert _wait(_submit('s1', 'cancelled'))[0] == CANCELLED
+
+def test_errors_map_to_failed(chart, monkeypatch):
+    def broken_chart(*args, **kwargs):
+        raise ValueError("bad column")
+    monkeypatch.setattr(chart_jobs, 'generate_chart', broken_chart)
+
+    status, fig, suggestion, error = _wait(_submit('s1', 'broken'))
+
+    assert status == FAILED
+    assert fig is None
+    assert error == "Error generating chart: bad column"
+
+def test_finished_jobs_are_pruned_after_ttl(chart, monkeypatch):
+    finished_id = _submit('s1', 'finished')
+    chart.release.set()
+    assert _wait(finished_id)[0] == DONE
+
+    chart.release.clear()
+    chart.started.clear()
+    running_id = _submit('s2', 'running')
+    assert chart.started.wait(5)
+
+    monkeypatch.setattr(chart_jobs, 'FINISHED_JOB_TTL', 0)
+    chart_jobs._prune_finished_jobs()
+
+    assert finished_id not in chart_jobs._jobs
+    assert 's1' not in chart_jobs._session_jobs
+    assert get_chart_status(finished_id)[0] == CANCELLED
+    # Unfinished jobs are never pruned
+    assert running_id in chart_jobs._jobs
+    assert chart_jobs._session_jobs['s2'] == running_id
+
+def test_cached_chart_completes_without_a_worker(chart):
+    key = chart_cache_key('bar', 'region', 'sales', 'cached', dataset_key='ds')
+    figure = FakeFigure()
+    cache_chart(key, figure, "from cache")
+
+    job_id = _submit('s1', 'cached', dataset_key='ds')
+
+    assert get_chart_status(job_id) == (DONE, figure, "from cache", None)
+    assert chart.calls == []
+
+def test_finished_chart_is_stored_in_chart_cache(chart):
+    job_id = _submit('s1', 'stored', dataset_key='ds')
+    chart.release.set()
+    status, fig, suggestion, error = _wait(job_id)
+
+    key = chart_cache_key('bar', 'region', 'sales', 'stored', dataset_key='ds')
+    assert get_cached_chart(key) == (fig, suggestion)
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation import (compute_correlation_matrix, correlation_matrix, pair_correlation,
+                         top_correlated, cluster_order)
+
+def _frame(n_rows=400, n_cols=12, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(n_rows, 1))
+    values = rng.normal(size=(n_rows, n_cols)) + base * np.linspace(0, 3, n_cols)
+    return pd.DataFrame(values + 1000, columns=[f"c{i}" for i in range(n_cols)])
+
+@pytest.mark.parametrize("block_size", [3, 5, 256])
+def test_matches_pandas_without_missing_values(block_size):
+    df = _frame()
+    result = compute_correlation_matrix(df, df.columns, block_size=block_size)
+    np.testing.assert_allclose(result.to_numpy(), df.corr().to_numpy(), atol=1e-5)
+
+@pytest.mark.parametrize("with_missing", [False, True])
+def test_large_offset_columns_keep_their_variation(with_missing):
+    rng = np.random.default_rng(4)
+    x = rng.normal(size=500)
+    df = pd.DataFrame({
+        'offset': 1e9 + np.round(20 * x),
+        'signal': x + rng.normal(scale=0.05, size=500)
+    })
+    if with_missing:
+        df.loc[::7, 'signal'] = np.nan
+
+    result = compute_correlation_matrix(df, df.columns)
+    assert result.at['offset', 'signal'] == pytest.approx(df['offset'].corr(df['signal']), abs=1e-5)
+
+@pytest.mark.parametrize("block_size", [3, 256])
+def test_matches_pandas_with_pairwise_missing_values(block_size):
+    df = _frame()
+    rng = np.random.default_rng(1)
+    df = df.mask(rng.random(df.shape) < 0.2)
+
+    result = compute_correlation_matrix(df, df.columns, block_size=block_size)
+    np.testing.assert_allclose(result.to_numpy(), df.corr().to_numpy(), atol=1e-5)
+
+@pytest.mark.parametrize("with_missing", [False, True])
+def test_constant_columns_are_nan(with_missing):
+    df = _frame(n_cols=4)
+    df['constant'] = 7.0
+    if with_missing:
+        df.loc[::4, 'c0'] = np.nan
+
+    result = compute_correlation_matrix(df, df.columns)
+    expected = df.corr()
+
+    assert result.loc['constant'].isna().all()
+    assert result['constant'].isna().all()
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), atol=1e-5)
+
+def test_pairs_with_fewer_than_two_shared_rows_are_nan():
+    df = pd.DataFrame({
+        'a': [1.0, 2.0, 3.0, np.nan, np.nan, np.nan],
+        'b': [np.nan, np.nan, 4.0, 5.0, 7.0, 6.0],
+        'c': [2.0, 1.0, 4.0, 3.0, 6.0, 5.0]
+    })
+    result = compute_correlation_matrix(df, df.columns)
+    expected = df.corr()
+
+    assert np.isnan(result.at['a', 'b'])
+    assert np.isnan(result.at['b', 'a'])
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), atol=1e-5)
+
+def test_pair_correlation_matches_with_cold_and_warm_cache():
+    df = _frame(n_cols=5, seed=3)
+    df.loc[::3, 'c1'] = np.nan
+    expected = df['c1'].corr(df['c4'])
+
+    cold = pair_correlation(df, 'c1', 'c4', dataset_key='pair-test')
+    correlation_matrix(df, df.columns, dataset_key='pair-test')
+    warm = pair_correlation(df, 'c1', 'c4', dataset_key='pair-test')
+
+    assert cold == pytest.approx(expected, abs=1e-5)
+    assert warm == pytest.approx(expected, abs=1e-5)
+
+def _block_matrix():
+    # Two correlated groups, {a, b, c} and {d, e}, plus an unrelated column f
+    columns = ['a', 'd', 'f', 'b', 'e', 'c']
+    strengths = {
+        ('a', 'b'): 0.9, ('a', 'c'): 0.8, ('b', 'c'): 0.85,
+        ('d', 'e'): -0.95,
+    }
+    matrix = pd.DataFrame(0.05, index=columns, columns=columns)
+    for (x, y), value in strengths.items():
+        matrix.loc[x, y] = matrix.loc[y, x] = value
+    for col in columns:
+        matrix.loc[col, col] = 1.0
+    return matrix
+
+def test_top_correlated_keeps_strongest_columns_in_original_order():
+    result = top_correlated(_block_matrix(), 3)
+    assert list(result.columns) == ['a', 'd', 'e']
+    assert list(result.index) == ['a', 'd', 'e']
+
+def test_top_correlated_returns_everything_when_k_is_large():
+    matrix = _block_matrix()
+    assert top_correlated(matrix, 10) is matrix
+
+def test_cluster_order_places_correlated_columns_together():
+    result = cluster_order(_block_matrix())
+    assert list(result.columns) == ['d', 'e', 'a', 'b', 'c', 'f']
+    assert list(result.index) == list(result.columns)
@@ -0,0 +1,116 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import chart_jobs
+import precompute
+from cache import LRUCache
+from chart_jobs import chart_cache_key, get_cached_chart, get_chart_status, submit_chart, DONE
+from nlp_parser import parse_command, parse_resample_options, parse_heatmap_options
+from precompute import likely_charts, CPUBudgetCancel, start_precompute
+
+DF = pd.DataFrame({
+    'date': pd.date_range('2024-01-01', periods=30, freq='D'),
+    'revenue': [float(i % 7) for i in range(30)],
+    'region': ['north', 'south', 'east'] * 10,
+    'units': [float(i) for i in range(30)]
+})
+COLUMN_TYPES = {'date': 'datetime', 'revenue': 'numerical', 'region': 'categorical', 'units': 'numerical'}
+
+COMMANDS = [
+    "",
+    "Trend of revenue over time",
+    "Show region as a pie chart",
+    "Compare region using bar chart",
+    "Distribution of units",
+    "Show revenue by region",
+]
+
+@pytest.fixture
+def chart_cache(monkeypatch):
+    monkeypatch.setattr(chart_jobs, '_chart_cache', LRUCache(
+        max_entries=64, max_bytes=64 * 1024 * 1024, sizeof=chart_jobs.estimate_chart_bytes
+    ))
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_likely_charts_match_parse_command(command):
+    chart_type, x_col, y_col, title, error = parse_command(command, DF, COLUMN_TYPES)
+
+    assert error is None
+    assert (chart_type, x_col, y_col, title) in likely_charts(DF, COLUMN_TYPES)
+
+def test_precomputed_charts_are_hit_by_real_commands(chart_cache, monkeypatch):
+    precompute._precompute('dataset', DF, COLUMN_TYPES, threading.Event())
+
+    def unexpected_chart(*args, **kwargs):
+        raise AssertionError("chart was not served from the cache")
+    monkeypatch.setattr(chart_jobs, 'generate_chart', unexpected_chart)
+
+    for command in COMMANDS:
+        chart_type, x_col, y_col, title, error = parse_command(command, DF, COLUMN_TYPES)
+        freq, reducer = parse_resample_options(command)
+        top_k, clustered = parse_heatmap_options(command)
+        options = dict(freq=freq, reducer=reducer, top_k=top_k, clustered=clustered, dataset_key='dataset')
+
+        assert get_cached_chart(chart_cache_key(chart_type, x_col, y_col, title, **options)) is not None
+        job_id = submit_chart('session', DF, chart_type, x_col, y_col, title, COLUMN_TYPES, **options)
+        assert get_chart_status(job_id)[0] == DONE
+
+def test_raw_row_charts_are_skipped_for_large_datasets(monkeypatch):
+    monkeypatch.setattr(precompute, 'PRECOMPUTE_MAX_RAW_ROWS', 10)
+
+    chart_types = {chart[0] for chart in likely_charts(DF, COLUMN_TYPES)}
+
+    assert chart_types == {'line', 'pie'}
+
+def test_cpu_budget_trips_cancellation():
+    event = threading.Event()
+
+    assert not CPUBudgetCancel(event, 60).is_set()
+    assert CPUBudgetCancel(event, -1).is_set()
+    event.set()
+    assert CPUBudgetCancel(event, 60).is_set()
+
+def test_exhausted_cpu_budget_caches_nothing(chart_cache, monkeypatch):
+    monkeypatch.setattr(precompute, 'PRECOMPUTE_CPU_BUDGET', -1)
+
+    precompute._precompute('dataset', DF, COLUMN_TYPES, threading.Event())
+
+    assert len(chart_jobs._chart_cache) == 0
+
+@pytest.fixture
+def blocked_precompute(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    gate = threading.Event()
+    monkeypatch.setattr(precompute, '_executor', executor)
+    monkeypatch.setattr(precompute, '_session_runs', {})
+    monkeypatch.setattr(precompute, '_started_datasets', LRUCache(max_entries=16))
+    monkeypatch.setattr(precompute, 'MAX_ACTIVE_PRECOMPUTES', 2)
+    monkeypatch.setattr(precompute, '_precompute', lambda *args: gate.wait(5))
+    yield gate
+    gate.set()
+    executor.shutdown(wait=True)
+
+def test_active_precomputes_are_bounded(blocked_precompute):
+    started = [start_precompute(f"s{i}", f"d{i}", DF, COLUMN_TYPES) for i in range(4)]
+
+    assert started == [True, True, False, False]
+    assert len(precompute._session_runs) == 2
+
+def test_new_upload_replaces_session_run_and_finished_runs_are_forgotten(blocked_precompute):
+    assert start_precompute('s1', 'first', DF, COLUMN_TYPES)
+    assert start_precompute('s2', 'second', DF, COLUMN_TYPES)
+    first_run = precompute._session_runs['s1']
+
+    # The queue is full, but replacing the session's own run frees a slot
+    assert start_precompute('s1', 'third', DF, COLUMN_TYPES)
+    assert first_run.cancel_event.is_set()
+    assert precompute._session_runs['s1'].dataset_key == 'third'
+
+    blocked_precompute.set()
+    precompute._executor.shutdown(wait=True)
+    assert precompute._session_runs == {}
+    # Each dataset is only precomputed once
+    assert not start_precompute('s3', 'second', DF, COLUMN_TYPES)
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from time_series import choose_frequency, _compute_rollup, resample_time_series
+
+START = datetime(2024, 1, 1)
+
+@pytest.mark.parametrize("span, expected", [
+    (timedelta(seconds=300), 's'),
+    (timedelta(minutes=30), 'min'),
+    (timedelta(days=14), 'h'),
+    (timedelta(days=365), 'D'),
+    (timedelta(days=3 * 365), 'W'),
+    (timedelta(days=20 * 365), 'MS'),
+    (timedelta(days=100 * 365), 'QS'),
+    (timedelta(days=500 * 365), 'YS'),
+    (timedelta(days=5000 * 365), 'YS'),
+])
+def test_choose_frequency_picks_finest_bucket_within_budget(span, expected):
+    assert choose_frequency(START, START + span, point_budget=500) == expected
+
+def test_choose_frequency_respects_point_budget():
+    span = timedelta(days=30)
+    assert choose_frequency(START, START + span, point_budget=1000) == 'h'
+    assert choose_frequency(START, START + span, point_budget=100) == 'D'
+
+def _transactions():
+    df = pd.DataFrame({
+        'date': pd.to_datetime(['2024-01-01 09:00', '2024-01-01 17:00', '2024-01-02 12:00',
+                                None, '2024-01-04 08:00']),
+        'revenue': [10.0, 5.0, 7.0, 100.0, 3.0]
+    })
+    return df, pd.to_datetime(df['date'])
+
+@pytest.mark.parametrize("reducer, expected", [
+    ('sum', [15.0, 7.0, 0.0, 3.0]),
+    ('mean', [7.5, 7.0, np.nan, 3.0]),
+    ('max', [10.0, 7.0, np.nan, 3.0]),
+    ('count', [2, 1, 0, 1]),
+])
+def test_compute_rollup_aggregates_daily_buckets(reducer, expected):
+    df, timestamps = _transactions()
+    rollup = _compute_rollup(df, timestamps, 'date', 'revenue', 'D', reducer)
+
+    assert list(rollup.columns) == ['date', 'revenue']
+    assert list(rollup['date']) == list(pd.date_range('2024-01-01', periods=4, freq='D'))
+    np.testing.assert_allclose(rollup['revenue'].to_numpy(dtype=float), expected)
+
+def test_compute_rollup_counts_rows_without_value_column():
+    df, timestamps = _transactions()
+    rollup = _compute_rollup(df, timestamps, 'date', None, 'D', 'count')
+
+    assert list(rollup.columns) == ['date', 'count']
+    assert list(rollup['count']) == [2, 1, 0, 1]
+
+def test_resample_keeps_small_unique_series_raw():
+    df = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=50, freq='D'), 'value': 1.0})
+    assert resample_time_series(df, 'date', 'value') == (None, None)
+
+def test_resample_buckets_dense_series_hourly():
+    df = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=2000, freq='10min'), 'value': 1.0})
+    rollup, freq = resample_time_series(df, 'date', 'value')
+
+    assert freq == 'h'
+    assert rollup['value'].iloc[0] == 6.0
+
+def test_resample_plots_raw_points_when_only_one_bucket():
+    df = pd.DataFrame({'date': pd.to_datetime(['2024-01-01'] * 600), 'value': 1.0})
+    assert resample_time_series(df, 'date', 'value') == (None, None)
+
+def test_resample_coarsens_requested_frequency_over_budget():
+    df = pd.DataFrame({'date': pd.date_range('2000-01-01', '2020-01-01', freq='7D'), 'value': 1.0})
+
+    rollup, freq = resample_time_series(df, 'date', 'value', freq='min')
+
+    assert freq == 'MS'
+    assert len(rollup) <= 500
+
+def test_resample_keeps_requested_frequency_within_budget():
+    df = pd.DataFrame({'date': pd.date_range('2020-01-01', '2021-01-01', freq='h'), 'value': 1.0})
+
+    rollup, freq = resample_time_series(df, 'date', 'value', freq='W')
+
+    assert freq == 'W'
+    assert rollup['value'].iloc[1] == 168.0
@@ -0,0 +1,133 @@
+import pandas as pd
+
+from cache import LRUCache
+from cancellation import check_cancelled
+
+# Bucket frequencies from finest to coarsest, with their approximate length in seconds
+FREQUENCIES = [
+    ('s', 1),
+    ('min', 60),
+    ('h', 3600),
+    ('D', 86400),
+    ('W', 7 * 86400),
+    ('MS', 30.44 * 86400),
+    ('QS', 91.31 * 86400),
+    ('YS', 365.25 * 86400)
+]
+
+FREQUENCY_LABELS = {
+    's': 'per-second',
+    'min': 'per-minute',
+    'h': 'hourly',
+    'D': 'daily',
+    'W': 'weekly',
+    'MS': 'monthly',
+    'QS': 'quarterly',
+    'YS': 'yearly'
+}
+
+# Supported reducers and how to describe their output
+REDUCER_LABELS = {
+    'sum': 'totals',
+    'mean': 'averages',
+    'median': 'medians',
+    'min': 'minimums',
+    'max': 'maximums',
+    'count': 'counts'
+}
+
+# Maximum number of points to draw before bucketing a time series
+DEFAULT_POINT_BUDGET = 500
+
+# Parsed timestamps per (dataset, column), and rollups per (dataset, columns, frequency, reducer)
+_timestamp_cache = LRUCache(max_entries=16)
+_rollup_cache = LRUCache(max_entries=64)
+
+def choose_frequency(start, end, point_budget=DEFAULT_POINT_BUDGET):
+    """Pick the finest bucket frequency that keeps the time span within the point budget."""
+    span = (end - start).total_seconds()
+    for freq, seconds in FREQUENCIES:
+        if span / seconds <= point_budget:
+            return freq
+    return FREQUENCIES[-1][0]
+
+def _parse_timestamps(df, x_col):
+    """Convert a column to datetimes and summarise its range."""
+    timestamps = pd.to_datetime(df[x_col], errors='coerce')
+    valid = timestamps.dropna()
+    if valid.empty:
+        return timestamps, None, None, 0, True
+    return timestamps, valid.min(), valid.max(), len(valid), valid.is_unique
+
+def _compute_rollup(df, timestamps, x_col, y_col, freq, reducer):
+    """Aggregate values into time buckets with a single vectorized resample."""
+    mask = timestamps.notna().to_numpy()
+    if y_col:
+        values = df[y_col].to_numpy()[mask]
+        value_col = y_col
+    else:
+        values = 1
+        value_col = 'count'
+    series = pd.Series(values, index=pd.DatetimeIndex(timestamps.to_numpy()[mask]))
+
+    resampler = series.resample(freq)
+    rollup = getattr(resampler, reducer)()
+    return rollup.rename(value_col).rename_axis(x_col).reset_index()
+
+def resample_time_series(df, x_col, y_col, freq=None, reducer='sum',
+                         point_budget=DEFAULT_POINT_BUDGET, dataset_key=None, cancel_event=None):
+    """
+    Roll up a time series into evenly sized buckets.
+
+    If freq is None, a frequency is chosen from the time span and point budget, and
+    small series with unique timestamps are left as raw points. A requested freq that
+    would give more buckets than the point budget is coarsened to fit it. Rollups are cached per
+    (column, frequency, reducer) when a dataset_key is given. A set cancel_event
+    stops the work with ChartCancelled between parsing and aggregation.
+
+    Returns:
+    - rollup: DataFrame with the bucket start in x_col and the aggregated value,
+      or None if the raw points should be plotted (including when there would be
+      fewer than two buckets)
+    - freq: The bucket frequency used, or None. It is coarser than the requested
+      freq if that one did not fit the point budget
+    """
+    if not y_col:
+        reducer = 'count'
+    elif reducer not in REDUCER_LABELS:
+        reducer = 'sum'
+
+    timestamp_key = (dataset_key, x_col) if dataset_key is not None else None
+    timestamps, start, end, count, is_unique = _timestamp_cache.get_or_compute(
+        timestamp_key, lambda: _parse_timestamps(df, x_col)
+    )
+    check_cancelled(cancel_event)
+    if len(timestamps) != len(df):
+        # Rows were dropped for missing values since the timestamps were cached
+        timestamps = timestamps.reindex(df.index)
+
+    if start is None:
+        return None, None
+    if freq is None:
+        if count <= point_budget and is_unique:
+            return None, None
+        freq = choose_frequency(start, end, point_budget)
+    else:
+        seconds = dict(FREQUENCIES).get(freq)
+        if seconds and (end - start).total_seconds() / seconds > point_budget:
+            freq = choose_frequency(start, end, point_budget)
+
+    rollup_key = (dataset_key, x_col, y_col, freq, reducer) if dataset_key is not None else None
+    rollup = _rollup_cache.get_or_compute(
+        rollup_key, lambda: _compute_rollup(df, timestamps, x_col, y_col, freq, reducer)
+    )
+    if len(rollup) < 2:
+        # A single bucket would draw one dot, so plot the raw points instead
+        return None, None
+    return rollup, freq
+
+def describe_rollup(y_col, freq, reducer):
+    """Describe a rollup for the chart suggestion, e.g. "monthly totals of 'revenue'"."""
+    if not y_col:
+        return f"{FREQUENCY_LABELS[freq]} row counts"
+    return f"{FREQUENCY_LABELS[freq]} {REDUCER_LABELS.get(reducer, 'totals')} of '{y_col}'"